@@ -1,43 +1,10 @@
 import re              # Standard module for Regular Expressions (used for pattern matching/search)
 import csv             # Standard module for reading/writing CSV files
 import os              # Standard module for interacting with the operating system (paths, files, etc.)
-import glob            # Standard module for finding files matching a pattern (like '*.docx')
-import sys             # Standard module for system-specific parameters and functions (used for exit, executable path)
-import subprocess      # Standard module for running new applications/commands (used to run 'pip install')
-
-# --- Auto-Installation Function ---
-def install_module(package):
-    """Installs a single required module using pip."""
-    print(f"\n--- Dependency Missing: Installing '{package}' ---")
-    try:
-        # Use sys.executable to ensure pip runs within the active venv/environment
-        subprocess.check_call([sys.executable, '-m', 'pip', 'install', package])
-        print(f"--- SUCCESS: Successfully installed {package}. ---")
-    except subprocess.CalledProcessError as e:
-        # Handles installation failure (e.g., no internet, permissions)
-        print(f"--- CRITICAL ERROR: Failed to install {package}. Please check your internet connection or permissions. ---")
-        print(f"Error details: {e}")
-        sys.exit(1) # Exit the script upon critical failure
-
-# --- Dependency Check and Initial Imports ---
-try:
-    # Attempt to import the primary required module from the python-docx package
-    from docx import Document
-except ImportError:
-    # If the docx module is not found, install the required package
-    install_module('python-docx')
-    # Try the import again after installation
-    try:
-        from docx import Document
-    except ImportError:
-        # Catch-all for scenarios where installation succeeded but import still fails 
-        # (e.g., due to a local file named docx.py conflicting with the library)
-        print("\n--- CRITICAL ERROR: The 'Document' class could not be imported.")
-        print("Please check if you have a file named 'docx.py' in this directory and rename it. ---")
-        sys.exit(1)
-
-
-# --- REMAINDER OF THE ORIGINAL SCRIPT (Client ID and Case Note Logic) ---
+import io              # Standard module for stream wrappers (used to buffer reads from the DOCX zip)
+import zipfile         # Standard module for opening the DOCX container (a DOCX is a ZIP of XML parts)
+from concurrent.futures import ProcessPoolExecutor  # Standard module for running the per-file conversions in parallel
+import xml.etree.ElementTree as ET  # Standard XML parser, used in streaming (iterparse) mode
 
 # Master list of all keys (used to define the boundaries of the data sections in the DOCX file)
 STOPPER_KEYS = [
@@ -49,6 +16,12 @@ STOPPER_KEYS = [
 # Creates a massive Regular Expression pattern to search for any of the STOPPER_KEYS
 LOOKAHEAD_PATTERN = '|'.join([re.escape(k) for k in STOPPER_KEYS])
 
+# Patterns used for every file/note, compiled once at import
+_NAME_ID_RE = re.compile(r'(.+?)\s*#(\d+)') # 'Client Name #ID' in the filename
+_DATE_RE = re.compile(r'(\d{1,2}/+\d{1,2}/+\d{2,4})') # A date like 1/1/2025 or 01/01/25
+_SLASH_RE = re.compile(r'/+') # Repeated slashes inside a date
+_STAFF_TRAIL_RE = re.compile(r'[:\s/]+$') # Trailing colons, spaces, or slashes after a staff name
+
 
 def extract_client_identifiers(docx_filepath):
     """
@@ -59,7 +32,7 @@ def extract_client_identifiers(docx_filepath):
     # Get the filename without the path and extension
     filename_base = os.path.splitext(os.path.basename(docx_filepath))[0]
     # Regex to find a string followed by an optional space, a '#', and then digits
-    name_id_match = re.match(r'(.+?)\s*#(\d+)', filename_base)
+    name_id_match = _NAME_ID_RE.match(filename_base)
     # Extract Client Name (group 1) or use the whole filename if no match
     header_data['Client Name'] = name_id_match.group(1).strip() if name_id_match else filename_base
     # Extract Client ID (group 2) or set to 'N/A'
@@ -67,181 +40,253 @@ def extract_client_identifiers(docx_filepath):
     return header_data
 
 
+# --- STREAMING DOCX READER ---
+
+# WordprocessingML namespace; every tag in word/document.xml is qualified with it
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+W_P, W_R, W_T = W_NS + 'p', W_NS + 'r', W_NS + 't'
+W_RPR, W_B, W_VAL = W_NS + 'rPr', W_NS + 'b', W_NS + 'val'
+W_TAB, W_BR, W_CR = W_NS + 'tab', W_NS + 'br', W_NS + 'cr'
+# Elements a paragraph may sit under to count as document text: the body and table cells.
+# Anything else (e.g., a text box, which Word also stores twice under mc:Choice/mc:Fallback) is skipped.
+W_TEXT_CONTAINERS = {W_NS + 'document', W_NS + 'body', W_NS + 'tbl', W_NS + 'tr', W_NS + 'tc'}
+
+# Read buffer for the compressed XML stream (1 MiB keeps OS read-ahead busy without holding the file in RAM)
+XML_READ_BUFFER_SIZE = 1 << 20
+# Write buffer for each output CSV, so a file's rows reach the disk in a few large writes
+CSV_WRITE_BUFFER_SIZE = 1 << 20
+
+
+def _read_run(run):
+    """Returns (text, is_bold) for a single <w:r> run element."""
+    bold_flag = run.find(f'{W_RPR}/{W_B}')
+    # <w:b/> means bold; <w:b w:val="0"/> (or "false"/"off") explicitly turns it off
+    is_bold = bold_flag is not None and bold_flag.get(W_VAL, 'true') not in ('0', 'false', 'off')
+
+    text_parts = []
+    for child in run:
+        if child.tag == W_T:
+            text_parts.append(child.text or '')
+        elif child.tag == W_TAB:
+            text_parts.append('\t')
+        elif child.tag in (W_BR, W_CR):
+            text_parts.append('\n')
+    return ''.join(text_parts), is_bold
+
+
+def iter_docx_paragraphs(docx_filepath):
+    """
+    Streams word/document.xml and yields each paragraph as a list of (text, is_bold) runs,
+    so only one paragraph is held in memory at a time. Also used by extract.py.
+    Accepts a file path or a binary file object (e.g., an in-memory BytesIO).
+    Paragraphs come in document order, whether they sit in the body or inside a table cell;
+    paragraphs nested anywhere else (text boxes, shapes) are not yielded.
+    """
+    open_elements = [] # Ancestors of the current element, used to detach finished paragraphs
+
+    with zipfile.ZipFile(docx_filepath, 'r') as docx_zip, \
+            io.BufferedReader(docx_zip.open('word/document.xml', 'r'), buffer_size=XML_READ_BUFFER_SIZE) as xml_stream:
+        # The member is decompressed chunk by chunk as the parser pulls from it; it is never read whole
+        for event, element in ET.iterparse(xml_stream, events=('start', 'end')):
+            if event == 'start':
+                open_elements.append(element)
+                continue
+
+            open_elements.pop()
+            if element.tag == W_P:
+                if all(ancestor.tag in W_TEXT_CONTAINERS for ancestor in open_elements):
+                    yield [_read_run(run) for run in element.iter(W_R)]
+                # Release the finished paragraph and drop it from its parent so memory stays flat
+                element.clear()
+                if open_elements:
+                    open_elements[-1].remove(element)
+
+
 # --- CASE NOTE EXTRACTION (Retained and robust) ---
 
 def _extract_raw_notes(docx_filepath):
     """
     Reads a DOCX file and extracts raw case notes based on bold formatting,
     starting after 'Case Notes:' is found.
+    Errors opening or parsing the file are raised to the caller.
     """
-    try:
-        # Load the document object from the file
-        document = Document(docx_filepath)
-    except Exception as e:
-        # Handles issues with opening the DOCX file
-        print(f"Error opening DOCX file for notes extraction: {e}")
-        return []
-
     all_notes = []
     current_note = None # Stores the note currently being assembled
     in_case_notes_section = False # Flag to start processing only after 'Case Notes:' is seen
 
-    # Regex to find a date pattern (e.g., 1/1/2025 or 01/01/25)
-    date_pattern = re.compile(r'(\d{1,2}/+\d{1,2}/+\d{2,4})')
+    def process_paragraph_list(paragraphs, current_note, all_notes, in_case_notes_section):
+        # Nested function to handle paragraphs (each one a list of (text, is_bold) runs)
+        for runs in paragraphs:
+            para_text = ''.join(text for text, _ in runs)
 
-    def process_paragraph_list(paragraphs, current_note, all_notes, in_case_notes_section, date_pattern):
-        # Nested function to handle paragraphs (from main body or inside tables)
-        for para in paragraphs:
             # Look for the start of the case notes section
-            if not in_case_notes_section and 'Case Notes:' in para.text:
+            if not in_case_notes_section and 'Case Notes:' in para_text:
                 in_case_notes_section = True
                 continue # Skip the "Case Notes:" header paragraph itself
 
             if not in_case_notes_section:
                 continue # Skip all paragraphs before the 'Case Notes:' header
 
-            full_paragraph_text = para.text.strip()
+            full_paragraph_text = para_text.strip()
             if not full_paragraph_text:
                 continue # Skip empty paragraphs
 
             is_note_start = False
             bold_text_accumulator = ""
+            non_bold_tail = "" # Everything after the bold header (the note content)
+            header_done = False
 
-            # Check for bold text at the start of the paragraph
-            for run in para.runs:
-                if run.bold:
-                    bold_text_accumulator += run.text
+            # Collect the bold text at the start of the paragraph, then the text that follows it
+            for text, is_bold in runs:
+                if is_bold and not header_done:
+                    bold_text_accumulator += text
                 else:
-                    # Stop if non-bold text is encountered (end of header)
-                    break 
+                    # Non-bold text ends the header; the remaining runs are the note content
+                    header_done = True
+                    non_bold_tail += text
 
             bold_text_cleaned = bold_text_accumulator.strip()
-            # Check if the accumulated bold text contains a date pattern
-            date_match = date_pattern.search(bold_text_cleaned)
+            # Check if the accumulated bold text starts with a date (skipping the regex
+            # entirely when the first character is not a digit)
+            date_match = _DATE_RE.match(bold_text_cleaned) if bold_text_cleaned[:1].isdigit() else None
 
-            # A new note starts if a date is found AND the bold text starts with that date
-            if date_match and bold_text_cleaned.startswith(date_match.group(0)):
+            # A new note starts if the bold text starts with a date
+            if date_match:
                 is_note_start = True
 
                 if current_note:
                     # Clean up and finalize the *previous* note before starting a new one
-                    current_note['Note'] = re.sub(r'\s+', ' ', current_note['Note']).strip()
+                    # (split() with no arguments collapses every run of whitespace)
+                    current_note['Note'] = ' '.join(word for part in current_note['Note'] for word in part.split())
                     all_notes.append(current_note)
 
                 # Extract and clean the Date
-                date = re.sub(r'/+', '/', date_match.group(1)).strip()
+                date = _SLASH_RE.sub('/', date_match.group(1)).strip()
                 # Extract the Staff name (text after the date)
                 staff_raw = bold_text_cleaned[date_match.end():].strip()
                 # Remove trailing colons, spaces, or slashes from staff name
-                staff = re.sub(r'[:\s/]+$', '', staff_raw)
+                staff = _STAFF_TRAIL_RE.sub('', staff_raw)
 
-                try:
-                    # Find the content of the note (text following the bold header)
-                    header_end_index = para.text.index(bold_text_accumulator) + len(bold_text_accumulator)
-                    note_content = para.text[header_end_index:].strip()
-                except ValueError:
-                    # Fallback: if bold text not found (shouldn't happen here), use full text
-                    note_content = full_paragraph_text 
+                # The content of the note is the text following the bold header
+                note_content = non_bold_tail.strip()
 
                 # Initialize the new current_note dictionary
                 current_note = {
                     'Date': date,
                     'Staff': staff,
-                    'Note': note_content
+                    'Note': [note_content] # Paragraph texts, joined when the note is finalized
                 }
 
             # If it's not a new note start, but we are inside a note, append the paragraph text
             elif not is_note_start and current_note:
-                current_note['Note'] += " " + full_paragraph_text
+                current_note['Note'].append(full_paragraph_text)
         
         # Return the updated state
         return current_note, all_notes, in_case_notes_section
 
-    # Process paragraphs inside tables first (as the Case Notes might be in a table)
-    for table in document.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                # Recursively process the paragraphs within each cell
-                current_note, all_notes, in_case_notes_section = process_paragraph_list(
-                    cell.paragraphs, current_note, all_notes, in_case_notes_section, date_pattern
-                )
-
-    # Process top-level paragraphs (those not contained in any table)
+    # Process every paragraph in document order in one pass (body and table cells alike),
+    # so the 'Case Notes:' header applies to whatever follows it
     current_note, all_notes, in_case_notes_section = process_paragraph_list(
-        document.paragraphs, current_note, all_notes, in_case_notes_section, date_pattern
+        iter_docx_paragraphs(docx_filepath),
+        current_note, all_notes, in_case_notes_section
     )
 
     # Finalize the very last note that was still held in current_note
     if current_note:
-        current_note['Note'] = re.sub(r'\s+', ' ', current_note['Note']).strip()
+        current_note['Note'] = ' '.join(word for part in current_note['Note'] for word in part.split())
         all_notes.append(current_note)
 
     return all_notes
 
 
 # --- BATCH EXECUTION (Simplified) ---
-def run_batch_conversion(base_directory="."):
+def _convert_one(input_file):
     """
-    Finds all DOCX files and writes a CSV report containing only
-    Client Name, HMIS #, and Case Notes for each.
+    Extracts Client Name, HMIS # and Case Notes from one DOCX file and writes its CSV.
+    Runs in a worker process, so the log lines are returned instead of printed.
     """
+    base_dir = os.path.dirname(input_file) # Directory of the input file
+    # Filename without extension
+    base_name = os.path.splitext(os.path.basename(input_file))[0] 
+    # Create output filename in the same directory
+    output_file = os.path.join(base_dir, f"{base_name}_CASENOTES_extracted.csv")
 
-    # Find all .docx files recursively (case-insensitive search)
-    docx_files = glob.glob(os.path.join(base_directory, '**', '*.docx'), recursive=True)
-    docx_files += glob.glob(os.path.join(base_directory, '**', '*.DOCX'), recursive=True)
+    log_lines = [f"--- Processing: {input_file} ---"]
 
-    if not docx_files:
-        print(f"\n--- ERROR: No DOCX files found. ---")
-        return
-
-    print(f"\nFound {len(docx_files)} DOCX files to process.")
-
-    # Loop through every found DOCX file
-    for input_file in docx_files:
-        print(f"--- Processing: {input_file} ---")
-
-        base_dir = os.path.dirname(input_file) # Directory of the input file
-        # Filename without extension
-        base_name = os.path.splitext(os.path.basename(input_file))[0] 
-        # Create output filename in the same directory
-        output_file = os.path.join(base_dir, f"{base_name}_CASENOTES_extracted.csv")
-
-        # 1. EXTRACT DATA
-        header_data = extract_client_identifiers(input_file) # From filename
+    # 1. EXTRACT DATA
+    header_data = extract_client_identifiers(input_file) # From filename
+    try:
         raw_notes = _extract_raw_notes(input_file) # From document content
+    except Exception as e:
+        # Handles issues with opening or parsing the DOCX file; the CSV is still written without notes
+        log_lines.append(f"Error opening DOCX file for notes extraction: {e}")
+        raw_notes = []
 
-        # 2. WRITE LEAN CSV
-        try:
-            # Open the new CSV file for writing
-            with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
+    # 2. WRITE LEAN CSV
+    try:
+        # Open the new CSV file for writing
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER_SIZE) as csvfile:
+            writer = csv.writer(csvfile)
 
+            writer.writerows([
                 # Write Client & HMIS # in key/value format (A1, B1, A2, B2)
-                writer.writerow(['Client', header_data.get('Client Name', '')])
-                writer.writerow(['HMIS #', header_data.get('Client ID', '')])
-
+                ['Client', header_data.get('Client Name', '')],
+                ['HMIS #', header_data.get('Client ID', '')],
                 # Write empty lines for visual separation in the CSV
-                for _ in range(4):
-                    writer.writerow(['', '']) 
-                
+                *[['', '']] * 4,
                 # --- Write Case Notes Section Header ---
-                writer.writerow(['Case Notes', ''])
+                ['Case Notes', ''],
                 # Write the column headers for the notes data
-                writer.writerow(['Date', 'Staff', 'Note'])
+                ['Date', 'Staff', 'Note'],
+            ])
+
+            # Write each extracted note as a new row, in a single writerows call
+            writer.writerows(
+                (note.get('Date', ''), note.get('Staff', ''), note.get('Note', ''))
+                for note in raw_notes
+            )
+
+        log_lines.append(f"--- SUCCESS: extracted casenote: {os.path.basename(output_file)}")
+    except Exception as e:
+        log_lines.append(f"--- ERROR: Failed to write CSV for {input_file}. Error: {e} ---")
+
+    log_lines.append("-" * 20)
+    return "\n".join(log_lines)
+
+
+def _find_docx(root):
+    """
+    Yields every .docx file under root (any letter case) in a single directory walk.
+    Like glob, hidden files and directories (names starting with '.') are skipped, which also
+    keeps out macOS '._' resource-fork files.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Prune hidden directories in place so os.walk never descends into them
+        dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+        for filename in filenames:
+            if not filename.startswith('.') and filename.lower().endswith('.docx'):
+                yield os.path.join(dirpath, filename)
+
+
+def run_batch_conversion(base_directory="."):
+    """
+    Finds all DOCX files and writes a CSV report containing only
+    Client Name, HMIS #, and Case Notes for each.
+    """
 
-                # Write each extracted note as a new row
-                for note in raw_notes:
-                    writer.writerow([
-                        note.get('Date', ''),
-                        note.get('Staff', ''),
-                        note.get('Note', '')
-                    ])
+    # Find all .docx files recursively (case-insensitive search)
+    docx_files = list(_find_docx(base_directory))
 
-            print(f"--- SUCCESS: extracted casenote: {os.path.basename(output_file)}")
-        except Exception as e:
-            print(f"--- ERROR: Failed to write CSV for {input_file}. Error: {e} ---")
+    if not docx_files:
+        print(f"\n--- ERROR: No DOCX files found. ---")
+        return
+
+    print(f"\nFound {len(docx_files)} DOCX files to process.")
 
-        print("-" * 20)
+    # Every DOCX is an independent job, so convert them in parallel (one worker per CPU)
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for message in executor.map(_convert_one, docx_files, chunksize=4):
+            print(message)
 
 # Standard entry point for a Python script
 if __name__ == "__main__":
@@ -1,22 +1,35 @@
 import sys
 import subprocess
+import importlib.util
 import os
 import re
 from pathlib import Path
-import shutil 
-# Imports for external libraries (pandas, openpyxl) will be deferred until after installation
+import io
+import csv
+from datetime import datetime
+# Imports for external libraries (openpyxl) will be deferred until after installation
 
 # --- Dependency Installation ---
-REQUIRED_PACKAGES = ['pandas', 'openpyxl', 'xlsxwriter'] 
+# openpyxl is the only writer: the output must be filled into template.xlsx, which xlsxwriter cannot open
+REQUIRED_PACKAGES = ['openpyxl'] 
 
 def install_packages():
-    """Checks for and installs required packages using pip in the active environment."""
+    """Installs any required packages that are missing, using pip in the active environment."""
     print("Checking for required packages...")
     
+    # Only packages whose module cannot be found are installed, so a warm run never spawns pip
+    missing = [
+        package for package in REQUIRED_PACKAGES
+        if importlib.util.find_spec(package.replace('-', '_').split('[')[0]) is None
+    ]
+    if not missing:
+        print("Required packages are already present.")
+        return
+    
     try:
-        # Installs all required packages using pip in the active environment (venv)
-        subprocess.check_call([sys.executable, "-m", "pip", "install", *REQUIRED_PACKAGES])
-        print("Required packages are installed successfully or were already present.")
+        # Installs the missing packages using pip in the active environment (venv)
+        subprocess.check_call([sys.executable, "-m", "pip", "install", *missing])
+        print("Required packages are installed successfully.")
     except subprocess.CalledProcessError as e:
         print(f"\nERROR: Failed to install required packages: {e}")
         print("Please ensure you are running this script from an active virtual environment (venv) and have internet access.")
@@ -40,91 +53,117 @@ def apply_alternating_row_color(sheet, start_row, end_row, end_col_letter):
     
     sheet.conditional_formatting.add(range_str, rule)
 
+def clear_row_values(sheet, start_row):
+    """Blanks every cell value from start_row down, leaving the rows and their formatting in place."""
+    if sheet.max_row < start_row:
+        return
+    for row in sheet.iter_rows(min_row=start_row, max_row=sheet.max_row):
+        for cell in row:
+            cell.value = None
+
 # --- Configuration ---
 PROFILE_TEMPLATE_FILENAME = "template.xlsx" 
 OUTPUT_FORMAT = ".xlsx"
+
+# Patterns used for every CSV, compiled once at import
+_CLIENT_CUT_RE = re.compile(r'\s\d+| Case Notes') # Where the client name ends (an ID or " Case Notes")
+_EXTRACTED_RE = re.compile(r'_extracted', re.IGNORECASE) # Suffix added by convertDOCtoCSV.py
+
+# Date formats written by convertDOCtoCSV.py (e.g., 1/1/2025 or 01/01/25)
+NOTE_DATE_FORMATS = ('%m/%d/%Y', '%m/%d/%y')
+# Excel display format for the Date column (template rows mix m/d/yyyy and General)
+NOTE_DATE_EXCEL_FORMAT = 'm/d/yyyy'
+
+def _parse_note_date(date_text):
+    """Parses a case note date into a date object, or returns None if it is not a valid date."""
+    for date_format in NOTE_DATE_FORMATS:
+        try:
+            return datetime.strptime(date_text.strip(), date_format).date()
+        except ValueError:
+            continue
+    return None
 # ---------------------
 
-def extract_and_convert(case_notes_path: Path, template_path: Path):
+def extract_and_convert(case_notes_path: Path, template_bytes: bytes):
     """
-    Reads CSV data, copies template, and writes all data (Profile, Case Notes)
-    into the copied template, applying alternating row colors and preserving all formatting.
+    Reads CSV data, opens a fresh copy of the template from its cached bytes, and writes
+    all data (Profile, Case Notes) into it, applying alternating row colors and preserving all formatting.
     """
     # Import libraries here, now guaranteed to be installed.
-    import pandas as pd 
     import openpyxl as op 
     
     try:
         print(f"Processing: {case_notes_path.name}")
 
         # --- 1. Extract Metadata and Case Notes Data from CSV ---
-        with case_notes_path.open('r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
         client_name, hmis_number = "UNKNOWN CLIENT", "N/A"
-        data_lines = [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
-        
-        # Extract Client Name (Row 1) and HMIS # (Row 2)
-        if len(data_lines) >= 2:
-            if ',' in data_lines[0].strip():
-                full_client_string = data_lines[0].strip().split(',', 1)[1].strip().strip('"')
-                
-                # FIX 1: Truncate client name after the name (before the ID/Case Notes)
-                # Search for the start of a number or the string " Case Notes" and cut before it.
-                match = re.search(r'\s\d+| Case Notes', full_client_string)
-                if match:
-                    client_name = full_client_string[:match.start()].strip()
-                else:
-                    client_name = full_client_string.strip()
+        case_notes_header_search = 'Date,Staff,Note'
+        case_notes = []
+
+        # The file is read once, top to bottom: metadata lines, then the header search,
+        # then the csv reader takes over from just after the header
+        with case_notes_path.open('r', newline='', encoding='utf-8') as f:
+            # Client Name and HMIS # are on the first two non-empty, non-comment lines;
+            # the generators only pull as many lines from the file as needed
+            stripped_lines = (line.strip() for line in f)
+            data_lines = (line for line in stripped_lines if line and not line.startswith('#'))
+            client_line = next(data_lines, '')
+            hmis_line = next(data_lines, '')
+            
+            # Extract Client Name (Row 1) and HMIS # (Row 2)
+            if client_line and hmis_line:
+                if ',' in client_line:
+                    full_client_string = client_line.split(',', 1)[1].strip().strip('"')
                     
-            if ',' in data_lines[1].strip():
-                # HMIS # extracted from the second line
-                hmis_number = data_lines[1].strip().split(',', 1)[1].strip().strip('"')
+                    # FIX 1: Truncate client name after the name (before the ID/Case Notes)
+                    # Search for the start of a number or the string " Case Notes" and cut before it.
+                    match = _CLIENT_CUT_RE.search(full_client_string)
+                    if match:
+                        client_name = full_client_string[:match.start()].strip()
+                    else:
+                        client_name = full_client_string.strip()
+                        
+                if ',' in hmis_line:
+                    # HMIS # extracted from the second line
+                    hmis_number = hmis_line.split(',', 1)[1].strip().strip('"')
 
-        # Find Case Notes Header
-        header_index = -1
-        case_notes_header_search = 'Date,Staff,Note'
-        for i, line in enumerate(lines):
-            if line.strip().startswith(case_notes_header_search):
-                header_index = i
-                break
+            # Find Case Notes Header
+            found_header = False
+            for line in f:
+                if line.strip().startswith(case_notes_header_search):
+                    found_header = True
+                    break
 
-        if header_index == -1:
-            print(f"Skipping: '{case_notes_path.name}'. Could not find Case Notes header.")
-            return
+            if not found_header:
+                print(f"Skipping: '{case_notes_path.name}'. Could not find Case Notes header.")
+                return
 
-        # Read Case Notes Data
-        case_notes_df = pd.read_csv(
-            case_notes_path,
-            skiprows=header_index,
-            header=0,
-            encoding='utf-8'
-        )
-        
-        case_notes_df['Date'] = pd.to_datetime(case_notes_df['Date'], errors='coerce')
-        case_notes_df = case_notes_df.dropna(subset=['Date'])
+            # Read Case Notes Data (the rows after the header), dropping rows without a valid date.
+            # Dates are parsed to date-only values for Excel insertion.
+            for row in csv.reader(f):
+                date_text, staff, note = (row + ['', '', ''])[:3]
+                note_date = _parse_note_date(date_text)
+                if note_date is not None:
+                    case_notes.append([note_date, staff, note])
         
         # Sort in descending order
-        case_notes_df_sorted = case_notes_df.sort_values(by='Date', ascending=False)
+        case_notes.sort(key=lambda note_row: note_row[0], reverse=True)
         
-        if case_notes_df_sorted.empty:
+        if not case_notes:
             print(f"Skipping: '{case_notes_path.name}'. Case notes data is empty after sorting.")
             return
-            
-        # Ensure 'Date' column is date-only for Excel insertion
-        case_notes_df_sorted['Date'] = case_notes_df_sorted['Date'].dt.date
 
-        # --- 2. Create Output File by Copying Template ---
+        # --- 2. Create Output Workbook from the Template ---
         base_name = case_notes_path.name.rsplit('.', 1)[0]
-        base_name_cleaned = re.sub(r'_extracted', '', base_name, flags=re.IGNORECASE)
+        base_name_cleaned = _EXTRACTED_RE.sub('', base_name)
         output_filename = f"{base_name_cleaned}{OUTPUT_FORMAT}"
         output_path = case_notes_path.parent / output_filename
         
-        shutil.copy2(template_path, output_path)
-        print(f"  --> Copied template to: {output_path.name}")
+        # Load straight from the in-memory template (no copy on disk; saved to output_path below)
+        workbook = op.load_workbook(io.BytesIO(template_bytes))
+        print(f"  --> Created from template: {output_path.name}")
 
-        # --- 3. Load Copied File and Insert Data ---
-        workbook = op.load_workbook(output_path)
+        # --- 3. Insert Data ---
         
         # --- Sheet 1: Profile (B1 and B3 ONLY) ---
         profile_sheet = workbook.worksheets[0]
@@ -146,21 +185,24 @@ def extract_and_convert(case_notes_path: Path, template_path: Path):
             notes_sheet = workbook['Case Notes']
         except KeyError: pass
 
-        # Clear any existing placeholder data starting from row 2
-        notes_sheet.delete_rows(2, notes_sheet.max_row) 
+        # Insert sorted data starting from the second row, overwriting the template's placeholder
+        # rows in place (deleting them first would shift every row below)
+        note_rows = notes_sheet.iter_rows(min_row=2, max_row=len(case_notes) + 1, max_col=3)
+        for row_cells, row_data in zip(note_rows, case_notes):
+            for cell, value in zip(row_cells, row_data):
+                cell.value = value
+            # Give every date the same format, whatever the template row had
+            row_cells[0].number_format = NOTE_DATE_EXCEL_FORMAT
 
-        # Insert sorted data starting from the second row (row=2)
-        data_to_write = case_notes_df_sorted.values.tolist()
-        for row_index, row_data in enumerate(data_to_write, start=2):
-            for col_index, value in enumerate(row_data, start=1):
-                notes_sheet.cell(row=row_index, column=col_index, value=value)
+        # Clear any leftover placeholder data below the written rows
+        clear_row_values(notes_sheet, len(case_notes) + 2)
 
         # --- Sheet 3: Room Checks (Blank Placeholder) ---
         room_sheet = None
         try:
             room_sheet = workbook['Room Checks']
             # Clear any data to ensure it is a blank placeholder
-            room_sheet.delete_rows(2, room_sheet.max_row)
+            clear_row_values(room_sheet, 2)
         except KeyError:
             print("WARNING: Could not find a sheet named 'Room Checks'. Skipping conditional formatting for it.")
 
@@ -176,7 +218,7 @@ def extract_and_convert(case_notes_path: Path, template_path: Path):
         apply_alternating_row_color(profile_sheet, 1, 10, 'E') 
         
         # Case Notes (Data starts row 2)
-        apply_alternating_row_color(notes_sheet, 2, len(case_notes_df_sorted) + 1, 'C')
+        apply_alternating_row_color(notes_sheet, 2, len(case_notes) + 1, 'C')
         
         # Room Checks (Apply to first 100 rows for blank sheet)
         if room_sheet:
@@ -184,7 +226,7 @@ def extract_and_convert(case_notes_path: Path, template_path: Path):
         
         print("  --> Applied alternating row colors to all sheets.")
         
-        # --- 5. Save the Updated Template Copy ---
+        # --- 5. Save the Filled-In Workbook ---
         workbook.save(output_path)
         print(f"  --> Successfully saved data to: {output_path.name}")
 
@@ -206,8 +248,11 @@ if __name__ == "__main__":
         print(f"\nERROR: Template file not found at {profile_template_path}")
         print(f"Please ensure '{PROFILE_TEMPLATE_FILENAME}' is an **XLSX** file in the same directory as this script.")
     else:
+        # Read the template once; every workbook is created from these bytes
+        template_bytes = profile_template_path.read_bytes()
+
         for csv_file in current_dir.rglob('*.csv'):
             if 'template.xlsx' not in csv_file.name and 'Demo Case Notes .xlsx' not in csv_file.name: 
-                extract_and_convert(csv_file, profile_template_path)
+                extract_and_convert(csv_file, template_bytes)
 
         print("\nBatch conversion complete.")
@@ -1,64 +1,90 @@
 import re
 import os
 import sys
+import io
 import zipfile
-import glob
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, date
 
-# Try importing the necessary library, providing instructions if it's missing
-try:
-    from docx import Document # The library needed to read content from Word (.docx) files
-except ImportError:
-    # If python-docx is not installed, print an error and stop the script
-    print("\n--- CRITICAL ERROR: 'python-docx' not installed. ---")
-    print("This library is required to read the contents of the DOCX files.")
-    print("Please install it: pip install python-docx")
-    sys.exit(1)
+# Shared streaming DOCX reader (same folder), so both scripts read paragraphs the same way
+from convertDOCtoCSV import iter_docx_paragraphs
+
+# Keywords that mark a structured client case file, and the chunk size used to scan for them
+CASE_FILE_TERMS = ["Entry Date", "Exit Date"]
+SCAN_CHUNK_SIZE = 64 * 1024
+
+
+def _xml_contains_case_term(docx_file_path):
+    """
+    Scans the raw bytes of word/document.xml for a case file keyword, one chunk at a time.
+    The tail of each chunk is carried over so a keyword straddling two chunks is still found.
+    """
+    needles = [term.encode('utf-8') for term in CASE_FILE_TERMS]
+    tail_size = max(len(needle) for needle in needles) - 1
+
+    with zipfile.ZipFile(docx_file_path) as docx_zip, docx_zip.open('word/document.xml') as xml_stream:
+        tail = b''
+        while True:
+            chunk = xml_stream.read(SCAN_CHUNK_SIZE)
+            if not chunk:
+                return False
+            buffer = tail + chunk
+            if any(needle in buffer for needle in needles):
+                return True
+            tail = buffer[-tail_size:]
 
-# --- Configuration ---
-# A temporary folder name used to extract the contents of the input ZIP
-TEMP_DIR = 'temp_zip_extraction_dir'
 
 def is_case_file(docx_file_path):
     """
     Checks if a DOCX file contains "Entry Date" or "Exit Date" keywords
     to confirm it is a structured client case file.
+    Accepts a file path or a binary file object (e.g., an in-memory BytesIO).
     """
 
     try:
-        document = Document(docx_file_path)
+        # Fast path: the keyword is usually stored verbatim in the XML, so no parsing is needed
+        if _xml_contains_case_term(docx_file_path):
+            return True
+
+        # Word sometimes splits a phrase across runs (<w:t>Entry</w:t>...<w:t> Date</w:t>),
+        # so confirm a miss against the joined paragraph text
+        for runs in iter_docx_paragraphs(docx_file_path):
+            text = ''.join(run_text for run_text, _ in runs)
+            if any(term in text for term in CASE_FILE_TERMS):
+                return True
     except Exception:
         # If the file is corrupt or not a true DOCX structure, skip it
         return False
 
-    # Check the main body paragraphs for the keywords
-    for para in document.paragraphs:
-        if any(term in para.text for term in ["Entry Date", "Exit Date"]):
-            return True
+    return False # If no date terms are found anywhere, it's not considered a case file
 
-    # Also check content inside tables for the keywords
-    for table in document.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                if any(term in cell.text for term in ["Entry Date", "Exit Date"]):
-                    return True
 
-    return False # If no date terms are found anywhere, it's not considered a case file
+def _is_case_file_bytes(docx_blob):
+    """Same check as is_case_file, for a DOCX that is already held in memory."""
+    return is_case_file(io.BytesIO(docx_blob))
+
+
+# Members read and checked per round; bounds how many DOCX blobs are held in memory at once
+CHECK_BATCH_SIZE = 64
+
+def _read_zip_member(zip_ref, info):
+    """Returns the bytes of one ZIP member, or b'' if it cannot be read (then it fails the check)."""
+    try:
+        with zip_ref.open(info) as member_stream:
+            return member_stream.read()
+    except Exception:
+        # Unreadable member (e.g., corrupt or encrypted): skip it like any other bad DOCX
+        return b''
 
 
 def filter_and_copy_to_folder(input_zip_filepath, output_folder_path):
     """
-    Manages the entire process: extraction, filtering, and copying of matching files
-    to the specified output folder, preserving the structure.
+    Manages the entire process: reading the DOCX members of the ZIP, filtering them, and
+    extracting only the matching files to the specified output folder, preserving the structure.
     """
 
-    # 1. Prepare environment
-    if os.path.exists(TEMP_DIR):
-        shutil.rmtree(TEMP_DIR) # Delete the temporary directory if it already exists
-    os.makedirs(TEMP_DIR, exist_ok=True) # Create a fresh, empty temporary directory
-
-    # 2. Prepare output folder
+    # 1. Prepare output folder
     if os.path.exists(output_folder_path):
         print(f"Warning: Deleting existing output folder: {output_folder_path}")
         shutil.rmtree(output_folder_path) # Delete output folder if it exists (for clean run)
@@ -70,41 +96,44 @@ def filter_and_copy_to_folder(input_zip_filepath, output_folder_path):
     print(f"\n--- Starting File Filtering for: {os.path.basename(input_zip_filepath)} ---")
 
     try:
-        # 3. Extract contents of the input zip into the temporary directory
         with zipfile.ZipFile(input_zip_filepath, 'r') as zip_ref:
-            zip_ref.extractall(TEMP_DIR)
-
-        # 4. Find all .docx files (case-insensitive) inside the temporary directory recursively
-        docx_files = glob.glob(os.path.join(TEMP_DIR, '**', '*.docx'), recursive=True)
-        docx_files += glob.glob(os.path.join(TEMP_DIR, '**', '*.DOCX'), recursive=True)
-        files_found = len(docx_files)
-
-        if not docx_files:
-            print(f"No DOCX files found inside the ZIP file.")
-            return
-
-        # 5. Process each DOCX file
-        for docx_path in docx_files:
-            # Get the path of the file relative to the temp folder (this preserves the original folder structure)
-            relative_path = os.path.relpath(docx_path, TEMP_DIR)
-
-            print(f"  [Checking] {relative_path}...")
-
-            if is_case_file(docx_path):
-                # Check passed! Define the destination path in the new output folder
-                destination_path = os.path.join(output_folder_path, relative_path)
-
-                # Ensure the subdirectories in the output folder exist before copying
-                os.makedirs(os.path.dirname(destination_path), exist_ok=True)
-
-                # Copy the file from the temporary location to the final output folder
-                shutil.copy2(docx_path, destination_path) # copy2 attempts to preserve metadata
-
-                files_matched += 1
-                print(f"  [MATCHED] Copied {relative_path} to output folder.")
-            else:
-                # Check failed. Skip this file.
-                print(f"  [Skipped] {relative_path}: Missing 'Entry/Exit Date' tag.")
+            # 2. List the .docx members (case-insensitive) without extracting anything.
+            # Like glob, members under a hidden name (e.g., macOS '._' files) are left out.
+            docx_members = [
+                info for info in zip_ref.infolist()
+                if not info.is_dir() and info.filename.lower().endswith('.docx')
+                and not any(part.startswith('.') for part in info.filename.split('/'))
+            ]
+            files_found = len(docx_members)
+
+            if not docx_members:
+                print(f"No DOCX files found inside the ZIP file.")
+                return
+
+            # 3. Check the members in parallel worker processes. This process reads each member's
+            # bytes from the already-open ZIP (one index parse) and sends them to the pool in batches.
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                for batch_start in range(0, len(docx_members), CHECK_BATCH_SIZE):
+                    batch = docx_members[batch_start:batch_start + CHECK_BATCH_SIZE]
+                    docx_blobs = [_read_zip_member(zip_ref, info) for info in batch]
+                    match_results = executor.map(_is_case_file_bytes, docx_blobs, chunksize=4)
+
+                    for info, is_match in zip(batch, match_results):
+                        # The member name is its path inside the ZIP (this preserves the original folder structure)
+                        relative_path = info.filename
+
+                        print(f"  [Checking] {relative_path}...")
+
+                        if is_match:
+                            # 4. Check passed! Extract only this member into the output folder
+                            # (extract() creates the subdirectories and keeps the path inside the folder)
+                            zip_ref.extract(info, output_folder_path)
+
+                            files_matched += 1
+                            print(f"  [MATCHED] Copied {relative_path} to output folder.")
+                        else:
+                            # Check failed. Skip this file.
+                            print(f"  [Skipped] {relative_path}: Missing 'Entry/Exit Date' tag.")
 
 
     except FileNotFoundError:
@@ -113,12 +142,8 @@ def filter_and_copy_to_folder(input_zip_filepath, output_folder_path):
     except Exception as e:
         print(f"\n--- FATAL ERROR during processing: {e} ---")
         return
-    finally:
-        # 6. Cleanup: Always delete the temporary directory and its contents
-        if os.path.exists(TEMP_DIR):
-            shutil.rmtree(TEMP_DIR)
 
-    # 7. Report success and statistics
+    # 5. Report success and statistics
     print("\n" + "=" * 60)
     print(f"FILTERING COMPLETE!")
     print(f"Total DOCX files found in input: {files_found}")